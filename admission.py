@@ -0,0 +1,199 @@
+import collections
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import abort, current_app, g, request
+
+# Per-route admission control: token-bucket rate limits per client IP,
+# concurrency caps and early load shedding. State lives in a small SQLite
+# file so every gunicorn worker on the host sees the same buckets and slots.
+
+
+class AdmissionStore:
+    def __init__(self, path, stale_after=60):
+        self.path = path
+        self.stale_after = stale_after
+        self._local = threading.local()
+        # Store failures seen by this worker, written out with the next counter update
+        self._pending_errors = collections.Counter()
+        self._errors_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL, updated REAL);
+                CREATE TABLE IF NOT EXISTS slot (id TEXT PRIMARY KEY, route TEXT, started REAL);
+                CREATE TABLE IF NOT EXISTS counter (route TEXT, outcome TEXT, n INTEGER,
+                                                    PRIMARY KEY (route, outcome));
+            ''')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take_token(self, key, rate, burst):
+        """Take one token; return 0 if admitted, else seconds until one is available."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute('INSERT OR REPLACE INTO bucket VALUES (?, ?, ?)', (key, tokens, now))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def acquire_slot(self, route, limit):
+        """Claim one of `limit` in-flight slots for route; return its id or None."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            in_flight = conn.execute('SELECT COUNT(*) FROM slot WHERE route = ?', (route,)).fetchone()[0]
+            if in_flight >= limit:
+                # Slots left behind by killed workers expire instead of leaking
+                conn.execute('DELETE FROM slot WHERE started < ?', (now - self.stale_after,))
+                in_flight = conn.execute('SELECT COUNT(*) FROM slot WHERE route = ?', (route,)).fetchone()[0]
+            slot_id = None
+            if in_flight < limit:
+                slot_id = uuid.uuid4().hex
+                conn.execute('INSERT INTO slot VALUES (?, ?, ?)', (slot_id, route, now))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return slot_id
+
+    def release_slot(self, slot_id):
+        self._conn().execute('DELETE FROM slot WHERE id = ?', (slot_id,))
+
+    def count(self, route, outcome, n=1):
+        self._conn().execute(
+            'INSERT INTO counter VALUES (?, ?, ?) '
+            'ON CONFLICT (route, outcome) DO UPDATE SET n = n + excluded.n',
+            (route, outcome, n))
+        if self._pending_errors:
+            with self._errors_lock:
+                pending, self._pending_errors = self._pending_errors, collections.Counter()
+            for error_route, n in pending.items():
+                self.count(error_route, 'store_error', n)
+
+    def record_error(self, route):
+        """Remember a store failure; the store itself may be what is failing."""
+        with self._errors_lock:
+            self._pending_errors[route] += 1
+
+    def stats(self):
+        conn = self._conn()
+        stats = {}
+        for route, outcome, n in conn.execute('SELECT route, outcome, n FROM counter'):
+            stats.setdefault(route, {})[outcome] = n
+        for route, n in conn.execute('SELECT route, COUNT(*) FROM slot GROUP BY route'):
+            stats.setdefault(route, {})['in_flight'] = n
+        return stats
+
+
+# Queue times outside this window come from clock skew or a forged header
+MAX_CLOCK_SKEW = 5
+MAX_QUEUE_TIME = 300
+
+
+def queue_time():
+    """Seconds the request waited in front of the app, from X-Request-Start if a proxy sets it."""
+    header = request.headers.get('X-Request-Start', '')
+    value = header[2:] if header.startswith('t=') else header
+    try:
+        started = float(value)
+    except ValueError:
+        return 0
+    # Proxies send seconds, milliseconds or microseconds since the epoch
+    while started > time.time() * 10:
+        started /= 1000
+    waited = time.time() - started
+    if not -MAX_CLOCK_SKEW <= waited <= MAX_QUEUE_TIME:
+        return 0
+    return max(0, waited)
+
+
+def shed(store, route, outcome, code, retry_after):
+    """Reject the request; a failing counter write must not let it through."""
+    try:
+        store.count(route, outcome)
+    except sqlite3.Error as exc:
+        current_app.logger.warning('Could not count shed request: %s', exc)
+        store.record_error(route)
+    retry_after = min(retry_after, current_app.config.get('ADMISSION_MAX_RETRY_AFTER', 60))
+    abort(code, retry_after=max(1, math.ceil(retry_after)))
+
+
+def init_admission(app):
+    rules = app.config.get('ADMISSION_RULES') or {}
+    if not rules:
+        return
+    path = app.config.get('ADMISSION_STORE', 'admission.db')
+    if not os.path.isabs(path):
+        # Serverless deploys only have a writable temp dir
+        folder = tempfile.gettempdir() if os.environ.get('VERCEL_URL') else app.instance_path
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as exc:
+            app.logger.warning('Cannot create %s (%s), keeping admission state in %s',
+                               folder, exc, tempfile.gettempdir())
+            folder = tempfile.gettempdir()
+        path = os.path.join(folder, path)
+    store = AdmissionStore(path)
+    app.extensions['admission'] = store
+
+    @app.before_request
+    def admit():
+        rule = rules.get(request.endpoint)
+        if rule is None or request.method not in rule.get('methods', (request.method,)):
+            return
+        route = request.endpoint
+        try:
+            waited = queue_time()
+            if waited > app.config.get('ADMISSION_MAX_QUEUE_TIME', 2.0):
+                shed(store, route, 'shed_queue', 503, app.config.get('ADMISSION_RETRY_AFTER', 5))
+
+            if 'rate' in rule:
+                # remote_addr is the real client once ProxyFix (TRUSTED_PROXY_HOPS) is applied
+                wait = store.take_token(f'{route}:{request.remote_addr}', rule['rate'], rule['burst'])
+                if wait:
+                    shed(store, route, 'shed_rate', 429, wait)
+
+            if 'concurrency' in rule:
+                # No waiting for a slot: a queued request would hold a worker
+                # that cheap routes need
+                slot_id = store.acquire_slot(route, rule['concurrency'])
+                if slot_id is None:
+                    shed(store, route, 'shed_busy', 503, app.config.get('ADMISSION_RETRY_AFTER', 5))
+                g.admission_slot = slot_id
+
+            store.count(route, 'admitted')
+        except sqlite3.Error as exc:
+            # Fail open: a broken limiter must not take the site down with it
+            current_app.logger.warning('Admission control unavailable: %s', exc)
+            store.record_error(route)
+
+    @app.teardown_request
+    def release(exc):
+        slot_id = g.pop('admission_slot', None)
+        if slot_id is not None:
+            try:
+                store.release_slot(slot_id)
+            except sqlite3.Error as err:
+                current_app.logger.warning('Could not release admission slot: %s', err)
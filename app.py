@@ -1,13 +1,18 @@
+import hmac
 import os
 from datetime import datetime
 from functools import wraps
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, abort
+from flask import (Flask, render_template, stream_with_context, request, redirect, url_for, session,
+                   flash, abort, get_flashed_messages, jsonify, current_app)
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from werkzeug.middleware.proxy_fix import ProxyFix
 from slugify import slugify
 import markdown2
 import bleach
 from config import config
+from admission import init_admission
 
 
 def create_app():
@@ -17,16 +22,31 @@ def create_app():
     config_name = os.environ.get('FLASK_ENV', 'development')
     app.config.from_object(config[config_name])
 
+    # A prebuilt read-only snapshot ships with its content, so it wins over
+    # everything else and skips table creation and seeding
+    snapshot = app.config.get('SQLITE_SNAPSHOT')
+    if snapshot:
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///file:{snapshot}?mode=ro&immutable=1&uri=true'
     # For Vercel serverless, use in-memory SQLite
-    if config_name == 'production' and 'vercel' in os.environ.get('VERCEL_URL', ''):
+    elif config_name == 'production' and 'vercel' in os.environ.get('VERCEL_URL', ''):
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
 
     # Init DB
     db.init_app(app)
 
     with app.app_context():
-        db.create_all()
-        seed_if_empty()
+        if db.engine.dialect.name == 'sqlite':
+            apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'], read_only=bool(snapshot))
+        if not snapshot:
+            db.create_all()
+            seed_if_empty()
+
+    # Resolve the real client address behind the platform's router
+    if app.config.get('TRUSTED_PROXY_HOPS'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'])
+
+    # Rate limits and load shedding for expensive endpoints
+    init_admission(app)
 
     # Security headers
     @app.after_request
@@ -39,24 +59,26 @@ def create_app():
     # Routes
     @app.route('/')
     def index():
+        # Queries are passed unevaluated so they run while the template
+        # streams, after the page header has already been flushed.
         posts = (Post.query
                  .filter_by(published=True)
-                 .order_by(Post.created_at.desc())
-                 .all())
+                 .order_by(Post.created_at.desc()))
         categories = Category.query.all()
         popular_posts = (Post.query
                         .filter_by(published=True)
                         .order_by(Post.view_count.desc())
                         .limit(5)
                         .all())
-        return render_template('index.html', posts=posts, categories=categories, popular_posts=popular_posts)
+        return stream_page('index.html', posts=posts, categories=categories, popular_posts=popular_posts)
 
     @app.route('/post/<slug>')
     def post_detail(slug):
         post = Post.query.filter_by(slug=slug, published=True).first_or_404()
-        # Increment view count
-        post.view_count += 1
-        db.session.commit()
+        # Increment view count (snapshots are read-only)
+        if not app.config.get('SQLITE_SNAPSHOT'):
+            post.view_count += 1
+            db.session.commit()
         html = render_markdown(post.content_md)
         return render_template('post.html', post=post, html=html)
 
@@ -65,9 +87,8 @@ def create_app():
         category = Category.query.filter_by(slug=slug).first_or_404()
         posts = (Post.query
                  .filter_by(category_id=category.id, published=True)
-                 .order_by(Post.created_at.desc())
-                 .all())
-        return render_template('category.html', category=category, posts=posts)
+                 .order_by(Post.created_at.desc()))
+        return stream_page('category.html', category=category, posts=posts)
 
     @app.route('/tag/<slug>')
     def tag_posts(slug):
@@ -75,9 +96,8 @@ def create_app():
         posts = (Post.query
                  .filter(Post.tags.contains(tag))
                  .filter_by(published=True)
-                 .order_by(Post.created_at.desc())
-                 .all())
-        return render_template('tag.html', tag=tag, posts=posts)
+                 .order_by(Post.created_at.desc()))
+        return stream_page('tag.html', tag=tag, posts=posts)
 
     @app.route('/search')
     def search():
@@ -93,13 +113,14 @@ def create_app():
                              Post.excerpt.contains(query)
                          )
                      )
-                     .order_by(Post.created_at.desc())
-                     .all())
-        return render_template('search.html', posts=posts, query=query)
+                     .order_by(Post.created_at.desc()))
+        return stream_page('search.html', posts=posts, query=query)
 
     # Admin auth
     @app.route('/admin/login', methods=['GET', 'POST'])
     def admin_login():
+        if app.config.get('SQLITE_SNAPSHOT'):
+            return snapshot_admin_redirect()
         if request.method == 'POST':
             password = request.form.get('password', '')
             expected = app.config.get('ADMIN_PASSWORD', 'changeme')
@@ -222,6 +243,17 @@ def create_app():
         return render_template('admin_edit.html', mode='edit', post=post,
                              categories=Category.query.all())
 
+    # Read-only counters: not behind login_required, so they stay reachable in
+    # snapshot mode and for monitoring with the ADMISSION_STATS_TOKEN header
+    @app.route('/admin/admission')
+    def admin_admission():
+        token = app.config.get('ADMISSION_STATS_TOKEN')
+        sent = request.headers.get('X-Admission-Token', '')
+        if not (session.get('is_admin') or (token and hmac.compare_digest(sent, token))):
+            abort(403)
+        store = app.extensions.get('admission')
+        return jsonify(store.stats() if store else {})
+
     # Admin category management
     @app.route('/admin/categories', methods=['GET', 'POST'])
     @login_required
@@ -318,9 +350,61 @@ class Post(db.Model):
 
 
 # Helpers
+STREAM_HEAD_BYTES = 1024  # flush the page head as soon as it is rendered
+STREAM_BUFFER = 64  # then batch template events; a chunk per event floods the ASGI loop
+
+
+def buffered_stream(events):
+    buf, size, head_sent = [], 0, False
+    for piece in events:
+        buf.append(piece)
+        size += len(piece)
+        if len(buf) >= STREAM_BUFFER or (not head_sent and size >= STREAM_HEAD_BYTES):
+            yield ''.join(buf)
+            buf, size, head_sent = [], 0, True
+    if buf:
+        yield ''.join(buf)
+
+
+def stream_page(template_name, **context):
+    """Stream a template so the header is sent before the post list renders."""
+    # Headers and the session cookie go out before the body renders, so
+    # everything that touches the session has to happen now: consume flashed
+    # messages so they are not shown again, and read is_admin (used by
+    # base.html) so the response still gets Vary: Cookie.
+    get_flashed_messages()
+    session.get('is_admin')
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    events = app.jinja_env.get_template(template_name).generate(context)
+    return stream_with_context(buffered_stream(events))
+
+
+def apply_sqlite_pragmas(engine, pragmas, read_only=False):
+    """Set connection-time pragmas on every new SQLite connection."""
+    if read_only:
+        # Journal settings need write access; only keep the read-side tuning
+        pragmas = {k: v for k, v in pragmas.items() if k not in ('journal_mode', 'synchronous')}
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def snapshot_admin_redirect():
+    flash('Admin is disabled while serving a read-only snapshot', 'error')
+    return redirect(url_for('index'))
+
+
 def login_required(view_func):
     @wraps(view_func)
     def wrapper(*args, **kwargs):
+        # Sessions carried over from a writable deploy must not reach admin writes
+        if current_app.config.get('SQLITE_SNAPSHOT'):
+            return snapshot_admin_redirect()
         if not session.get('is_admin'):
             return redirect(url_for('admin_login'))
         return view_func(*args, **kwargs)
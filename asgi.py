@@ -0,0 +1,14 @@
+import os
+from a2wsgi import WSGIMiddleware
+from app import create_app
+
+# ASGI entry point: the event loop owns client sockets, so slow readers and
+# writers no longer pin a whole worker. Requests run in a thread pool sized by
+# ASGI_THREADS; the SQLAlchemy session stays synchronous inside those threads.
+app = WSGIMiddleware(create_app(), workers=int(os.environ.get('ASGI_THREADS', 32)))
+
+# For local development
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.environ.get('PORT', 5000))
+    uvicorn.run(app, host='0.0.0.0', port=port)
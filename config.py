@@ -8,6 +8,44 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD') or 'changeme'
 
+    # Applied to every new SQLite connection. WAL lets gunicorn workers read
+    # while another one writes; busy_timeout makes writers wait instead of failing.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -64000,  # negative means KiB, i.e. 64 MB
+        'busy_timeout': 5000,
+    }
+
+    # Prebuilt database opened read-only (see `python init_db.py --snapshot`).
+    # Relative paths resolve against the instance folder, like sqlite:///blog.db.
+    SQLITE_SNAPSHOT = os.environ.get('SQLITE_SNAPSHOT')
+
+    # Number of reverse proxies in front of the app whose X-Forwarded-For is
+    # trusted for the client address. Hosting platforms route through one.
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS') or any(
+        os.environ.get(k) for k in ('VERCEL_URL', 'DYNO', 'RAILWAY_ENVIRONMENT', 'GAE_ENV')))
+
+    # Admission control for expensive endpoints, keyed by endpoint name.
+    # rate/burst: token bucket per client IP (requests per second, bucket size) -> 429
+    # concurrency: requests in flight across all workers, beyond that -> 503
+    # methods: only these methods are limited (default: all)
+    ADMISSION_RULES = {
+        'search': {'rate': 2, 'burst': 10, 'concurrency': 4},
+        'admin_login': {'rate': 0.1, 'burst': 5, 'methods': ('POST',)},
+    }
+    # Shared state file for all workers; relative paths go in the instance
+    # folder (the temp dir on Vercel)
+    ADMISSION_STORE = os.environ.get('ADMISSION_STORE') or 'admission.db'
+    # Shed requests that already waited this long in front of the app (X-Request-Start)
+    ADMISSION_MAX_QUEUE_TIME = 2.0
+    # Retry-After sent with 503s, and the cap for computed 429 waits (seconds)
+    ADMISSION_RETRY_AFTER = 5
+    ADMISSION_MAX_RETRY_AFTER = 60
+    # Lets monitoring read /admin/admission with an X-Admission-Token header
+    ADMISSION_STATS_TOKEN = os.environ.get('ADMISSION_STATS_TOKEN')
+
 class DevelopmentConfig(Config):
     DEBUG = True
     DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///blog.db'
@@ -20,7 +58,7 @@ class ProductionConfig(Config):
     if not DATABASE_URL:
         # Fallback options
         if os.environ.get('VERCEL_URL'):
-            # For Vercel serverless (temporary data)
+            # For Vercel serverless (temporary data, unless SQLITE_SNAPSHOT is set)
             DATABASE_URL = 'sqlite:///:memory:'
         else:
             # Local production fallback
@@ -34,6 +72,8 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    SQLITE_SNAPSHOT = None
+    ADMISSION_RULES = {}
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
 config = {
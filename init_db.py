@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """
 Database initialization script for production deployment
+
+    python init_db.py                        # create tables and seed
+    python init_db.py --snapshot blog-ro.db  # build a read-only snapshot for SQLITE_SNAPSHOT
 """
 import os
+import sqlite3
+import sys
+from sqlalchemy import create_engine
 from app import create_app, db
 
 def init_db():
@@ -18,5 +24,38 @@ def init_db():
         seed_if_empty()
         print("✅ Initial data seeded!")
 
+def build_snapshot(path):
+    """Copy the configured database into a standalone SQLite file"""
+    app = create_app()
+    if app.config.get('SQLITE_SNAPSHOT'):
+        sys.exit("❌ Unset SQLITE_SNAPSHOT so the snapshot is built from DATABASE_URL")
+    with app.app_context():
+        # Same resolution as the app uses when opening the snapshot
+        if not os.path.isabs(path):
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, path)
+        if os.path.exists(path):
+            os.remove(path)
+
+        target = create_engine(f'sqlite:///{path}')
+        db.metadata.create_all(target)
+        with db.engine.connect() as source, target.begin() as dest:
+            for table in db.metadata.sorted_tables:
+                rows = source.execute(table.select()).mappings().all()
+                if rows:
+                    dest.execute(table.insert(), [dict(row) for row in rows])
+                print(f"📋 {table.name}: {len(rows)} rows")
+        target.dispose()
+
+    # Immutable readers ignore journals, so everything must live in the main file
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.execute('VACUUM')
+    conn.close()
+    print(f"✅ Snapshot written to {path}")
+
 if __name__ == '__main__':
-    init_db()
\ No newline at end of file
+    if len(sys.argv) == 3 and sys.argv[1] == '--snapshot':
+        build_snapshot(sys.argv[2])
+    else:
+        init_db()